@@ -1,5 +1,25 @@
 """Core application configuration and models."""
-from .config import initialize_settings
-from .models import get_vector_store, get_index, reset_models
+from .config import initialize_settings, get_config
+from .models import (
+    get_vector_store,
+    get_index,
+    reset_models,
+    register_reset_hook,
+    create_hnsw_index,
+    open_vector_store,
+    close_vector_store,
+    lifespan,
+)
 
-__all__ = ["initialize_settings", "get_vector_store", "get_index", "reset_models"]
+__all__ = [
+    "initialize_settings",
+    "get_config",
+    "get_vector_store",
+    "get_index",
+    "reset_models",
+    "register_reset_hook",
+    "create_hnsw_index",
+    "open_vector_store",
+    "close_vector_store",
+    "lifespan",
+]
@@ -3,27 +3,64 @@ Configuration module for centralized settings and credentials.
 """
 import base64
 import os
+from functools import lru_cache
+from pathlib import Path
+import httpx
 from dotenv import load_dotenv
+from pydantic import BaseModel, Field
 from llama_index.core.settings import Settings
+from llama_index.core.utils import get_tokenizer
 from llama_index.embeddings.openai import OpenAIEmbedding
 from llama_index.llms.openai import OpenAI
 
-# Load environment variables from .env file
-load_dotenv()
+class AppConfig(BaseModel):
+    """Application settings, overridable by upper-case environment variables."""
+    # Model and Embedding Configuration
+    model: str = "gpt-4.1-mini"
+    embedding: str = "text-embedding-3-small"
+    embed_dim: int = 1536
 
-# Model and Embedding Configuration
-MODEL = os.getenv("MODEL", "gpt-4.1-mini")
-EMBEDDING = os.getenv("EMBEDDING", "text-embedding-3-small")
+    token_id: str = ""
 
-TOKEN_ID = os.getenv("TOKEN_ID", "")
+    # Azure OpenAI Configuration
+    openai_api_base: str = ""
 
-# Azure OpenAI Configuration
-OPENAI_API_BASE = os.getenv("OPENAI_API_BASE", "")
+    # Paths
+    persist_dir: str = "./persist/"
+    db_path: str = "pg.duckdb"
+    data_dir: str = "./policies"
 
-# Paths
-PERSIST_DIR = os.getenv("PERSIST_DIR", "./persist/")
-DB_PATH = os.getenv("DB_PATH", "pg.duckdb")
-DATA_DIR = os.getenv("DATA_DIR", "./policies")
+    # DuckDB Configuration
+    duckdb_threads: int = Field(default_factory=lambda: os.cpu_count() or 1)
+    duckdb_memory_limit: str = "4GB"
+
+    @property
+    def db_file(self) -> str:
+        """Path to the DuckDB database file inside the persist directory."""
+        return os.fspath(Path(self.persist_dir) / self.db_path)
+
+
+@lru_cache
+def get_config() -> AppConfig:
+    """
+    Load the application settings once per process.
+    """
+    # Load environment variables from .env file
+    load_dotenv()
+    overrides = {
+        name: os.environ[name.upper()]
+        for name in AppConfig.model_fields
+        if name.upper() in os.environ
+    }
+    return AppConfig(**overrides)
+
+
+# Shared HTTP transport for outbound LLM and embedding calls
+HTTP_LIMITS = httpx.Limits(max_connections=1000, max_keepalive_connections=100)
+HTTP_TIMEOUT = httpx.Timeout(connect=10.0, read=300.0, write=60.0, pool=30.0)
+
+http_client = httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+http_async_client = httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
 
 
 def initialize_settings():
@@ -31,15 +68,25 @@ def initialize_settings():
     Initialize LlamaIndex global settings with Azure OpenAI and Ollama embeddings.
     This should be called once at application startup.
     """
+    config = get_config()
+
     Settings.llm = OpenAI(
-        api_key=TOKEN_ID,
-        api_base=OPENAI_API_BASE,
-        model=MODEL,
+        api_key=config.token_id,
+        api_base=config.openai_api_base,
+        model=config.model,
+        http_client=http_client,
+        async_http_client=http_async_client,
     )
 
     Settings.embed_model = OpenAIEmbedding(
-        api_base=OPENAI_API_BASE,
-        model=EMBEDDING,
-        api_key=TOKEN_ID,
+        api_base=config.openai_api_base,
+        model=config.embedding,
+        api_key=config.token_id,
         timeout=300.0,
+        embed_batch_size=256,
+        http_client=http_client,
+        async_http_client=http_async_client,
     )
+
+    # Load the tokenizer used by the text splitters before the first ingestion
+    get_tokenizer()("warmup")
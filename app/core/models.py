@@ -1,41 +1,262 @@
 """
 Shared model initialization module.
-Provides singleton-like access to vector store and index.
+Opens the vector store and index once per application lifespan and
+exposes them to routes as FastAPI dependencies.
 """
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+import loguru
+from fastapi import FastAPI, Request
 from llama_index.core import VectorStoreIndex
+from llama_index.core.vector_stores.types import VectorStoreQuery, VectorStoreQueryResult
 from llama_index.vector_stores.duckdb import DuckDBVectorStore
-from .config import PERSIST_DIR, DB_PATH
+from .config import get_config
 
-# Global instances (lazy loaded)
-_vector_store = None
-_index = None
+# Name of the approximate nearest neighbour index over the embedding column
+HNSW_INDEX_NAME = "embedding_hnsw"
 
+# Callbacks run by reset_models to drop objects derived from the index
+_reset_hooks = []
 
-def get_vector_store() -> DuckDBVectorStore:
+
+class HNSWDuckDBVectorStore(DuckDBVectorStore):
+    """
+    DuckDB vector store whose similarity search can be served by an HNSW index.
+    """
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        """
+        Query the vector store for top k most similar nodes.
+        
+        VSS only rewrites ``ORDER BY array_cosine_distance(...) LIMIT k`` over a
+        FLOAT[n] column into an HNSW index scan, unlike the nested
+        ``ORDER BY score DESC`` query of the base class. The index applies
+        metadata filters after picking the k nearest rows, so filtered queries
+        keep an exact scan. Rows are fetched without Arrow, whose export of
+        wide FLOAT[n] columns crashes DuckDB 1.3.2.
+        """
+        if self.embed_dim is None:
+            return super().query(query, **kwargs)
+        
+        embedding_type = self._get_embedding_type(self.embed_dim)
+        filter_expression = self._build_metadata_filter_expressions(query.filters)
+        if query.filters is not None and query.filters.filters:
+            order_by = "score DESC"
+        else:
+            order_by = f"array_cosine_distance(embedding, $1::{embedding_type})"
+        
+        cursor = self.client.execute(
+            f"SELECT node_id, text, embedding, metadata_, "
+            f"array_cosine_similarity(embedding, $1::{embedding_type}) AS score "
+            f"FROM {self.table_name} "
+            f"WHERE {filter_expression} "
+            f"ORDER BY {order_by} "
+            "LIMIT $2;",
+            [query.query_embedding, query.similarity_top_k],
+        )
+        columns = [column[0] for column in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        
+        return self._arrow_row_to_query_result(rows)
+
+
+def open_vector_store() -> HNSWDuckDBVectorStore:
+    """
+    Open the persisted vector store and configure its connection.
+    """
+    config = get_config()
+    vector_store = HNSWDuckDBVectorStore.from_local(
+        config.db_file,
+        embed_dim=config.embed_dim,
+    )
+    configure_connection(vector_store)
+    try:
+        load_vss(vector_store)
+    except Exception as e:
+        # array_cosine_distance is built in, so the same query runs as an exact scan
+        loguru.logger.warning(f"vss extension not loaded, searches will scan the table: {str(e)}")
+    match_embedding_column(vector_store)
+    return vector_store
+
+
+def match_embedding_column(vector_store: DuckDBVectorStore):
+    """
+    Align the store with the type of its persisted embedding column.
+    
+    Tables created without embed_dim store embeddings as FLOAT[], which the
+    array similarity functions and HNSW indexes cannot use. Migrate the
+    column to FLOAT[embed_dim] when every stored vector has that length,
+    otherwise fall back to list similarity over a full scan.
+    """
+    embed_dim = vector_store.embed_dim
+    if embed_dim is None:
+        return
+    
+    conn = vector_store.client
+    table_name = vector_store.table_name
+    (column_type,) = conn.execute(
+        "SELECT data_type FROM information_schema.columns "
+        "WHERE table_name = ? AND column_name = 'embedding';",
+        [table_name],
+    ).fetchone()
+    if column_type == f"FLOAT[{embed_dim}]":
+        return
+    
+    if column_type == "FLOAT[]":
+        (mismatched,) = conn.execute(
+            f"SELECT count(*) FROM {table_name} WHERE len(embedding) <> ?;",
+            [embed_dim],
+        ).fetchone()
+        if not mismatched:
+            loguru.logger.info(f"Migrating {table_name}.embedding from FLOAT[] to FLOAT[{embed_dim}]")
+            conn.execute(f"ALTER TABLE {table_name} ALTER embedding TYPE FLOAT[{embed_dim}];")
+            return
+    
+    loguru.logger.warning(
+        f"{table_name}.embedding is {column_type}, not FLOAT[{embed_dim}], searches will scan the table"
+    )
+    vector_store.embed_dim = None
+
+
+def configure_connection(vector_store: DuckDBVectorStore):
+    """
+    Tune the DuckDB connection for repeated searches over the same file.
+    """
+    config = get_config()
+    conn = vector_store.client
+    conn.execute(f"SET threads = {config.duckdb_threads};")
+    conn.execute(f"SET memory_limit = '{config.duckdb_memory_limit}';")
+    conn.execute("SET enable_external_file_cache = true;")
+
+
+def close_vector_store(vector_store: DuckDBVectorStore):
+    """
+    Close the DuckDB connection held by a vector store.
+    """
+    # Release the file handle held by the connection
+    vector_store._shared_conn.close()
+
+
+def load_vss(vector_store: DuckDBVectorStore):
+    """
+    Load the DuckDB VSS extension so HNSW indexes can be used and persisted.
+    """
+    conn = vector_store.client
+    conn.install_extension("vss")
+    conn.load_extension("vss")
+    conn.execute("SET hnsw_enable_experimental_persistence = true;")
+
+
+def create_hnsw_index(vector_store: DuckDBVectorStore):
+    """
+    Create the HNSW index over the embeddings so similarity search avoids a full scan.
+    """
+    if vector_store.embed_dim is None:
+        raise ValueError("HNSW indexes require a fixed-size FLOAT[n] embedding column")
+    load_vss(vector_store)
+    vector_store.client.execute(
+        f"CREATE INDEX IF NOT EXISTS {HNSW_INDEX_NAME} "
+        f"ON {vector_store.table_name} USING HNSW (embedding) "
+        "WITH (metric = 'cosine');"
+    )
+
+
+def load_models(app: FastAPI):
+    """
+    Open the vector store and build the index on the application state.
+    """
+    app.state.vector_store = open_vector_store()
+    app.state.index = VectorStoreIndex.from_vector_store(app.state.vector_store)
+
+
+def _close_retired_stores(app: FastAPI):
+    """
+    Close replaced vector stores once no request is using them anymore.
+    """
+    for vector_store in list(app.state.retired_stores):
+        if not app.state.store_users[id(vector_store)]:
+            app.state.retired_stores.remove(vector_store)
+            del app.state.store_users[id(vector_store)]
+            close_vector_store(vector_store)
+
+
+def close_models(app: FastAPI):
+    """
+    Close every vector store connection held on the application state.
+    """
+    for vector_store in [app.state.vector_store, *app.state.retired_stores]:
+        if vector_store is not None:
+            close_vector_store(vector_store)
+    app.state.retired_stores.clear()
+    app.state.vector_store = None
+    app.state.index = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Load the models on startup and close the DuckDB connections on shutdown.
+    """
+    # Requests using each vector store, and stores replaced by reset_models
+    app.state.store_users = Counter()
+    app.state.retired_stores = []
+    load_models(app)
+    yield
+    close_models(app)
+
+
+@asynccontextmanager
+async def _lease_vector_store(app: FastAPI) -> AsyncIterator[DuckDBVectorStore]:
+    """
+    Hold the current vector store open until the caller is done with it.
+    """
+    vector_store = app.state.vector_store
+    app.state.store_users[id(vector_store)] += 1
+    try:
+        yield vector_store
+    finally:
+        app.state.store_users[id(vector_store)] -= 1
+        _close_retired_stores(app)
+
+
+async def get_vector_store(request: Request) -> AsyncIterator[DuckDBVectorStore]:
+    """
+    Get the vector store instance for the current application.
+    """
+    async with _lease_vector_store(request.app) as vector_store:
+        yield vector_store
+
+
+async def get_index(request: Request) -> AsyncIterator[VectorStoreIndex]:
     """
-    Get or create the vector store instance.
+    Get the vector store index instance for the current application.
+    
+    The backing store is leased for the whole request, so a concurrent
+    reset_models does not close its connection while the query still runs.
     """
-    global _vector_store
-    if _vector_store is None:
-        _vector_store = DuckDBVectorStore.from_local(f"{PERSIST_DIR}{DB_PATH}")
-    return _vector_store
+    async with _lease_vector_store(request.app):
+        yield request.app.state.index
 
 
-def get_index() -> VectorStoreIndex:
+def register_reset_hook(hook):
     """
-    Get or create the vector store index instance.
+    Register a callable to be invoked whenever the models are reset.
     """
-    global _index
-    if _index is None:
-        vector_store = get_vector_store()
-        _index = VectorStoreIndex.from_vector_store(vector_store)
-    return _index
+    _reset_hooks.append(hook)
+    return hook
 
 
-def reset_models():
+def reset_models(app: FastAPI):
     """
-    Reset global model instances. Useful for testing.
+    Reload the vector store and index, e.g. after new documents are ingested.
+    
+    The new models are swapped in before the previous store is retired, and
+    that store is only closed once in-flight requests have released it.
     """
-    global _vector_store, _index
-    _vector_store = None
-    _index = None
+    previous = app.state.vector_store
+    load_models(app)
+    for hook in _reset_hooks:
+        hook()
+    app.state.retired_stores.append(previous)
+    _close_retired_stores(app)
@@ -1,6 +1,13 @@
 """
 Gradio frontend for GenAI RAG Chatbot.
 """
-from app.frontend.gradio_app import create_gradio_app
 
 __all__ = ["create_gradio_app"]
+
+
+def __getattr__(name):
+    # Import the Gradio app lazily so importing this package does not load gradio
+    if name == "create_gradio_app":
+        from app.frontend.gradio_app import create_gradio_app
+        return create_gradio_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
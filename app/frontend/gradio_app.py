@@ -2,34 +2,102 @@
 Gradio interface for GenAI RAG Chatbot.
 Provides a user-friendly web UI to interact with the search API endpoint.
 """
+from contextlib import asynccontextmanager
 import httpx
-import gradio as gr
-from typing import Optional
+import orjson
+from typing import TYPE_CHECKING, Any, AsyncIterator, Optional
 import loguru
 
+if TYPE_CHECKING:
+    import gradio as gr
+
 # Configuration
 API_BASE_URL = "http://localhost:8000"
-SEARCH_ENDPOINT = f"{API_BASE_URL}/api/v1/search"
+SEARCH_PATH = "/api/v1/search"
+
+# Shared HTTP client (lazy loaded) so connections to the backend are reused
+_CLIENT: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Get or create the shared HTTP client for the RAG backend.
+    """
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        _CLIENT = httpx.AsyncClient(
+            base_url=API_BASE_URL,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            timeout=httpx.Timeout(connect=10.0, read=600.0, write=60.0, pool=30.0),
+        )
+    return _CLIENT
+
+
+async def close_client():
+    """
+    Close the shared HTTP client and release its pooled connections.
+    """
+    global _CLIENT
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+        _CLIENT = None
+
+
+@asynccontextmanager
+async def client_lifespan(app: Any) -> AsyncIterator[None]:
+    """
+    Close the shared HTTP client when the Gradio server shuts down.
+    
+    Pass it to ``demo.launch(app_kwargs={"lifespan": client_lifespan})`` so
+    the client is closed on the event loop its connections were opened on.
+    """
+    yield
+    await close_client()
+
+
+def format_results(results: list[dict]) -> str:
+    """
+    Format the source documents returned by the backend for display.
+    
+    Args:
+        results: List of search results from the API
+        
+    Returns:
+        Human-readable summary of the source documents
+    """
+    if not results:
+        return "ℹ️ No source documents found for this query."
+    
+    lines = [f"📄 Found {len(results)} source document(s):\n"]
+    for i, result in enumerate(results, 1):
+        content = result.get("summary", "")[:200]  # First 200 chars
+        score = result.get("score")
+        if score:
+            lines.append(f"{i}. [Score: {score:.2f}] {content}...")
+        else:
+            lines.append(f"{i}. {content}...")
+    return "\n".join(lines) + "\n"
 
 
 async def search_rag(
     query: str,
     similarity_top_k: int,
     use_sub_questions: bool,
-) -> tuple[str, str, str]:
+) -> AsyncIterator[tuple[str, str, str]]:
     """
-    Send a search query to the RAG backend and return the results.
+    Send a search query to the RAG backend and stream back the results.
     
     Args:
         query: The search query
         similarity_top_k: Number of top similar results to return
         use_sub_questions: Whether to use SubQuestionQueryEngine
         
-    Returns:
-        Tuple of (answer, processing_time, results_summary)
+    Yields:
+        Tuple of (answer, processing_time, results_summary), updated as tokens arrive
     """
     if not query.strip():
-        return "❌ Please enter a question.", "0.00s", ""
+        yield "❌ Please enter a question.", "0.00s", ""
+        return
     
     try:
         loguru.logger.info(f"Sending query to RAG API: {query}")
@@ -38,65 +106,78 @@ async def search_rag(
             "query": query,
             "similarity_top_k": similarity_top_k,
             "use_sub_questions": use_sub_questions,
+            "stream": True,
         }
         
-        async with httpx.AsyncClient(timeout=600.0) as client:
-            response = await client.post(
-                SEARCH_ENDPOINT,
-                json=payload,
-            )
+        answer = ""
+        async with get_client().stream(
+            "POST",
+            SEARCH_PATH,
+            content=orjson.dumps(payload),
+            headers={"content-type": "application/json"},
+        ) as response:
+            if response.is_error:
+                await response.aread()
             response.raise_for_status()
             
-        data = response.json()
-        answer = data.get("answer", "No answer received")
-        processing_time = data.get("processing_time_seconds", 0)
-        results = data.get("results", [])
-        
-        # Format processing time
-        time_str = f"{processing_time:.2f}s"
-        
-        # Format results summary
-        if results:
-            results_summary = f"📄 Found {len(results)} source document(s):\n\n"
-            for i, result in enumerate(results, 1):
-                content = result.get("summary", "")[:200]  # First 200 chars
-                score = result.get("score")
-                if score:
-                    results_summary += f"{i}. [Score: {score:.2f}] {content}...\n"
-                else:
-                    results_summary += f"{i}. {content}...\n"
-        else:
-            results_summary = "ℹ️ No source documents found for this query."
-        
-        loguru.logger.info(f"Successfully retrieved answer in {time_str}")
-        return answer, time_str, results_summary
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                event = orjson.loads(line)
+                
+                if event["type"] == "token":
+                    answer += event["content"]
+                    yield answer, "⏳ Generating...", ""
+                
+                elif event["type"] == "results":
+                    # Format processing time
+                    time_str = f"{event.get('processing_time_seconds', 0):.2f}s"
+                    results_summary = format_results(event.get("results", []))
+                    
+                    loguru.logger.info(f"Successfully retrieved answer in {time_str}")
+                    yield answer or "No answer received", time_str, results_summary
+                
+                elif event["type"] == "error":
+                    error_msg = f"❌ API Error: {event.get('detail')}"
+                    loguru.logger.error(error_msg)
+                    yield error_msg, "N/A", ""
         
     except httpx.ConnectError:
         error_msg = f"❌ Connection error: Cannot reach API at {API_BASE_URL}. Make sure the FastAPI backend is running."
         loguru.logger.error(error_msg)
-        return error_msg, "N/A", ""
+        yield error_msg, "N/A", ""
     except httpx.TimeoutException:
         error_msg = "❌ Request timeout: The query took too long to process. Please try a simpler question."
         loguru.logger.error(error_msg)
-        return error_msg, "N/A", ""
+        yield error_msg, "N/A", ""
     except httpx.HTTPStatusError as e:
-        error_detail = e.response.json().get("detail", str(e))
+        # Error bodies are not guaranteed to be JSON, e.g. from a proxy
+        try:
+            error_detail = orjson.loads(e.response.content).get("detail", str(e))
+        except (orjson.JSONDecodeError, AttributeError):
+            error_detail = e.response.text or str(e)
         error_msg = f"❌ API Error: {error_detail}"
         loguru.logger.error(f"HTTP {e.response.status_code}: {error_msg}")
-        return error_msg, "N/A", ""
+        yield error_msg, "N/A", ""
     except Exception as e:
         error_msg = f"❌ Unexpected error: {str(e)}"
         loguru.logger.error(error_msg)
-        return error_msg, "N/A", ""
+        yield error_msg, "N/A", ""
 
 
-def create_gradio_app() -> gr.Blocks:
+def create_gradio_app() -> "gr.Blocks":
     """
     Create and return the Gradio interface for the RAG chatbot.
     
     Returns:
         gr.Blocks: The Gradio interface
     """
+    # Imported here so search_rag can be used without loading gradio
+    import gradio as gr
+    
+    # Create the shared backend client once for all UI sessions
+    get_client()
+
     with gr.Blocks(
         title="Airline policies RAG Chatbot Assistant",
         theme=gr.themes.Soft(),
@@ -213,4 +294,5 @@ if __name__ == "__main__":
         server_port=7860,
         share=False,
         show_error=True,
+        app_kwargs={"lifespan": client_lifespan},
     )
@@ -1,10 +1,14 @@
 """
 Ingestion router for document processing and vector store indexing.
 """
+import asyncio
+import os
 import time
+from functools import lru_cache
 import loguru
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from llama_index.core import (
+    Settings,
     SimpleDirectoryReader,
     StorageContext,
     VectorStoreIndex,
@@ -17,18 +21,67 @@ from llama_index.core.extractors import (
 )
 from llama_index.core.ingestion import IngestionPipeline
 from llama_index.core.node_parser import (TokenTextSplitter, SentenceSplitter)
-from llama_index.vector_stores.duckdb import DuckDBVectorStore
 from llama_index.readers.file import PyMuPDFReader
 
 from app.schemas import IngestionRequest, IngestionResponse
-from app.core import get_index, reset_models
-from app.core.config import PERSIST_DIR, DB_PATH, DATA_DIR
+from app.core import (
+    reset_models,
+    create_hnsw_index,
+    open_vector_store,
+    close_vector_store,
+)
 
 router = APIRouter(prefix="/api/v1", tags=["ingestion"])
 
+# Concurrent LLM calls per metadata extractor
+NUM_WORKERS = 8
+
+# Below this many files, spawning reader processes costs more than it saves
+MIN_FILES_FOR_POOL = 16
+
+# Sentence splitters reused across requests, one per (chunk_size, chunk_overlap)
+SPLITTER_CACHE_SIZE = 8
+
+
+@lru_cache(maxsize=SPLITTER_CACHE_SIZE)
+def _get_splitter(chunk_size: int, chunk_overlap: int) -> SentenceSplitter:
+    """
+    Get or create the sentence splitter for the given chunking settings.
+    """
+    return SentenceSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+    )
+
+
+def _index_nodes(nodes):
+    """
+    Insert embedded nodes into the persisted vector store and index them.
+    
+    Runs in a worker thread: the bulk insert and the HNSW build are CPU-bound.
+    """
+    vector_store = open_vector_store()
+    try:
+        storage_context = StorageContext.from_defaults(vector_store=vector_store)
+        VectorStoreIndex(
+            nodes,
+            storage_context=storage_context,
+            insert_batch_size=1024,
+            show_progress=True,
+        )
+        
+        # Index the embeddings for approximate nearest neighbour search
+        try:
+            create_hnsw_index(vector_store)
+        except Exception as e:
+            loguru.logger.warning(f"HNSW index not created, searches will scan the table: {str(e)}")
+    finally:
+        # The application reopens its own store once indexing is done
+        close_vector_store(vector_store)
+
 
 @router.post("/ingest", response_model=IngestionResponse)
-async def ingest_documents(request: IngestionRequest):
+async def ingest_documents(request: IngestionRequest, http_request: Request):
     """
     Ingest documents from a directory and create vector store index.
     
@@ -45,11 +98,20 @@ async def ingest_documents(request: IngestionRequest):
     try:
         # Load documents from specified directory
         loguru.logger.info(f"Loading documents from {request.input_dir}")
-        documents = SimpleDirectoryReader(
+        reader = SimpleDirectoryReader(
             input_dir=request.input_dir,
             file_extractor={"*.pdf": PyMuPDFReader()},
             recursive=True,
-        ).load_data()
+        )
+        # Parse files off the event loop, across a process pool for larger directories
+        num_files = len(reader.input_files)
+        if num_files < MIN_FILES_FOR_POOL:
+            documents = await asyncio.to_thread(reader.load_data)
+        else:
+            documents = await asyncio.to_thread(
+                reader.load_data,
+                num_workers=min(os.cpu_count() or 1, num_files),
+            )
         
         documents_count = len(documents)
         loguru.logger.info(f"Loaded {documents_count} documents")
@@ -60,32 +122,32 @@ async def ingest_documents(request: IngestionRequest):
         #    chunk_size=request.chunk_size,
         #    chunk_overlap=request.chunk_overlap,
         #)
-        text_splitter = SentenceSplitter(
-            chunk_size=request.chunk_size,
-            chunk_overlap=request.chunk_overlap,
-        )
+        text_splitter = _get_splitter(request.chunk_size, request.chunk_overlap)
         transformations = []
         # Build extractors based on request flags
         transformations.append(text_splitter)
         
         if request.extract_title:
-            transformations.append(TitleExtractor(nodes=5))
+            transformations.append(TitleExtractor(nodes=5, num_workers=NUM_WORKERS))
         
         if request.extract_qa:
-            transformations.append(QuestionsAnsweredExtractor(questions=3))
+            transformations.append(QuestionsAnsweredExtractor(questions=3, num_workers=NUM_WORKERS))
         
         if request.extract_keywords:
-            transformations.append(KeywordExtractor(keywords=15))
+            transformations.append(KeywordExtractor(keywords=15, num_workers=NUM_WORKERS))
         
         if request.extract_summary:
-            transformations.append(SummaryExtractor(summaries=["prev", "self"], nodes=5, num_workers=5))
+            transformations.append(SummaryExtractor(summaries=["prev", "self"], nodes=5, num_workers=NUM_WORKERS))
+        
+        # Embed inside the async pipeline so the index build does not block the event loop
+        transformations.append(Settings.embed_model)
         
         # Create ingestion pipeline
         pipeline = IngestionPipeline(transformations=transformations)
         
         loguru.logger.info("Processing documents through pipeline")
-        # Process documents to extract nodes with metadata
-        nodes = pipeline.run(
+        # Process documents to extract nodes with metadata and embeddings
+        nodes = await pipeline.arun(
             documents=documents,
             in_place=True,
             show_progress=True,
@@ -96,12 +158,10 @@ async def ingest_documents(request: IngestionRequest):
         
         # Create vector store and index
         loguru.logger.info("Creating vector store and index")
-        vector_store = DuckDBVectorStore(DB_PATH, persist_dir=PERSIST_DIR)
-        storage_context = StorageContext.from_defaults(vector_store=vector_store)
-        VectorStoreIndex(nodes, storage_context=storage_context)
+        await asyncio.to_thread(_index_nodes, nodes)
         
-        # Reset global model instances to reload the new index
-        reset_models()
+        # Reload the application models against the new index
+        reset_models(http_request.app)
         
         processing_time = time.time() - start_time
         
@@ -2,110 +2,347 @@
 Search router for querying the vector store index.
 """
 import time
-import json
+from collections import OrderedDict
 import loguru
-from fastapi import APIRouter, HTTPException
+import orjson
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from llama_index.core import VectorStoreIndex
+from llama_index.core.base.base_query_engine import BaseQueryEngine
 from llama_index.core.query_engine import SubQuestionQueryEngine
 from llama_index.core.tools import QueryEngineTool, ToolMetadata
 from llama_index.core.question_gen import LLMQuestionGenerator
+from llama_index.core.response_synthesizers import get_response_synthesizer
 from llama_index.core.question_gen.prompts import (
     DEFAULT_SUB_QUESTION_PROMPT_TMPL,
 )
 
 from app.schemas import SearchRequest, SearchResponse, SearchResult
-from app.core import get_index
+from app.core import get_index, register_reset_hook
 
 router = APIRouter(prefix="/api/v1", tags=["search"])
 
+SUB_QUESTION_PROMPT_TMPL = (
+    """
+                    Follow the example, but instead of giving a question, always prefix the question
+                    with: 'Answer in markdown. By first identifying and quoting the most relevant sources, '.
+                    """
+    + DEFAULT_SUB_QUESTION_PROMPT_TMPL
+)
+
+EMPTY_ANSWER_MESSAGE = "I couldn't find relevant information to answer your question. Please contact customer support for further assistance."
+
+# Question generator shared by all sub-question engines (lazy loaded)
+_question_gen = None
+
+# Query engines cached by (similarity_top_k, use_sub_questions, streaming)
+_engines: dict[tuple[int, bool, bool], BaseQueryEngine] = {}
+
+# Least recently used answers keyed by (normalized query, similarity_top_k, use_sub_questions),
+# each stored with the index it was computed on
+ANSWER_CACHE_SIZE = 1024
+_answers: OrderedDict[tuple[str, int, bool], tuple[VectorStoreIndex, SearchResponse]] = OrderedDict()
+
+
+@register_reset_hook
+def _clear_caches():
+    """
+    Drop cached query engines and answers so they are rebuilt against the current index.
+    """
+    _engines.clear()
+    _answers.clear()
+
+
+def _get_question_gen() -> LLMQuestionGenerator:
+    """
+    Get or create the sub-question generator.
+    
+    Built on first use rather than at import so it picks up the LLM
+    configured by initialize_settings.
+    """
+    global _question_gen
+    if _question_gen is None:
+        _question_gen = LLMQuestionGenerator.from_defaults(
+            prompt_template_str=SUB_QUESTION_PROMPT_TMPL,
+        )
+    return _question_gen
+
+
+def _answer_key(request: SearchRequest, use_sub_questions: bool) -> tuple[str, int, bool]:
+    """
+    Build the answer cache key for a search request.
+    """
+    return (request.query.strip().lower(), request.similarity_top_k, use_sub_questions)
+
+
+def _get_cached_answer(
+    key: tuple[str, int, bool],
+    index: VectorStoreIndex,
+) -> SearchResponse | None:
+    """
+    Get an answer cached for the given index and mark it as most recently used.
+    
+    Answers from queries that were still running when the models were reset
+    can be stored after the reset hook cleared the cache, so entries computed
+    on any other index are dropped instead of served.
+    """
+    entry = _answers.get(key)
+    if entry is None:
+        return None
+    cached_index, cached = entry
+    if cached_index is not index:
+        del _answers[key]
+        return None
+    _answers.move_to_end(key)
+    return cached
+
+
+def _cache_answer(
+    key: tuple[str, int, bool],
+    index: VectorStoreIndex,
+    response: SearchResponse,
+):
+    """
+    Store an answer, evicting the least recently used one when full.
+    """
+    _answers[key] = (index, response)
+    _answers.move_to_end(key)
+    if len(_answers) > ANSWER_CACHE_SIZE:
+        _answers.popitem(last=False)
+
+
+def _get_engine(
+    index: VectorStoreIndex,
+    similarity_top_k: int,
+    use_sub_questions: bool,
+    streaming: bool = False,
+) -> BaseQueryEngine:
+    """
+    Get or create the query engine for the given retrieval settings.
+    """
+    key = (similarity_top_k, use_sub_questions, streaming)
+    query_engine = _engines.get(key)
+    if query_engine is not None:
+        return query_engine
+    
+    if use_sub_questions:
+        # Use SubQuestionQueryEngine for complex queries
+        loguru.logger.info("Building SubQuestionQueryEngine for query decomposition")
+        
+        engine = index.as_query_engine(similarity_top_k=similarity_top_k)
+        
+        query_engine = SubQuestionQueryEngine.from_defaults(
+            query_engine_tools=[
+                QueryEngineTool(
+                    query_engine=engine,
+                    metadata=ToolMetadata(
+                        name="airline_policy_documents",
+                        description="Airline policy documents for answering questions about airline policies and related topics.",
+                    ),
+                )
+            ],
+            question_gen=_get_question_gen(),
+            # Sub-answers are gathered in full, only the final synthesis streams
+            response_synthesizer=get_response_synthesizer(
+                streaming=streaming,
+                use_async=True,
+            ),
+            use_async=True,
+        )
+    else:
+        # Use simple query engine
+        loguru.logger.info("Building standard query engine")
+        query_engine = index.as_query_engine(
+            similarity_top_k=similarity_top_k,
+            streaming=streaming,
+        )
+    
+    _engines[key] = query_engine
+    return query_engine
+
+
+def _is_complex_query(query: str) -> bool:
+    """
+    Check if a query is long or multi-part enough to benefit from sub-questions.
+    """
+    return len(query.split()) > 15 or " and " in query.lower() or query.count("?") > 1
+
+
+def _is_empty_answer(answer: str) -> bool:
+    """
+    Check if an answer is empty or the "Empty Response" placeholder.
+    """
+    return not answer or answer.strip() == "" or answer.strip().lower() == "empty response"
+
+
+def _extract_results(response) -> list[SearchResult]:
+    """
+    Build search results from the source nodes of a query response.
+    """
+    # Sub-question answers are also returned as source nodes, skip them
+    return [
+        SearchResult(
+            file_name=(metadata := node.metadata).get("file_name") or "Unknown",
+            summary=metadata.get("document_title") or "No summary available",
+            score=node.score,
+        )
+        for node in getattr(response, "source_nodes", ())
+        if not node.text.lstrip()[:13].lower().startswith("sub question:")
+    ]
+
+
+def _stream_event(event_type: str, **data) -> bytes:
+    """
+    Serialize a single newline-delimited JSON stream event.
+    """
+    return orjson.dumps({"type": event_type, **data}, option=orjson.OPT_APPEND_NEWLINE)
+
+
+async def _stream_search(
+    request: SearchRequest,
+    response,
+    index: VectorStoreIndex,
+    answer_key: tuple[str, int, bool],
+    start_time: float,
+):
+    """
+    Yield answer tokens as they are generated, followed by the source results.
+    """
+    answer = ""
+    sent = 0
+    try:
+        async for token in response.async_response_gen():
+            answer += token
+            # Hold tokens back while the answer could still be the "Empty Response" placeholder
+            if not sent and "empty response".startswith(answer.strip().lower()):
+                continue
+            yield _stream_event("token", content=answer[sent:])
+            sent = len(answer)
+        
+        # Small guardrails
+        if _is_empty_answer(answer):
+            loguru.logger.warning(f"Empty response for query: {request.query}")
+            answer = EMPTY_ANSWER_MESSAGE
+            yield _stream_event("token", content=answer)
+        elif sent < len(answer):
+            yield _stream_event("token", content=answer[sent:])
+        
+        results = _extract_results(response)
+        processing_time = time.time() - start_time
+        
+        loguru.logger.info(f"Search streamed in {processing_time:.2f}s")
+        
+        _cache_answer(
+            answer_key,
+            index,
+            SearchResponse(
+                query=request.query,
+                answer=answer,
+                results=results,
+                processing_time_seconds=processing_time,
+            ),
+        )
+        
+        yield _stream_event(
+            "results",
+            results=[result.model_dump() for result in results],
+            processing_time_seconds=processing_time,
+        )
+    
+    except Exception as e:
+        loguru.logger.error(f"Search failed: {str(e)}")
+        yield _stream_event("error", detail=f"Search failed: {str(e)}")
+
+
+async def _stream_cached(cached: SearchResponse):
+    """
+    Replay a cached answer as a single token followed by its results.
+    """
+    yield _stream_event("token", content=cached.answer)
+    yield _stream_event(
+        "results",
+        results=[result.model_dump() for result in cached.results],
+        processing_time_seconds=0.0,
+    )
+
 
 @router.post("/search", response_model=SearchResponse)
-async def search(request: SearchRequest):
+async def search(request: SearchRequest, index: VectorStoreIndex = Depends(get_index)):
     """
     Search the vector store index for documents matching the query.
     
     - **query**: Search query string
     - **similarity_top_k**: Number of top similar results to return (1-50)
     - **use_sub_questions**: Use SubQuestionQueryEngine for complex query decomposition
+    - **force_sub_questions**: Decompose even queries that look simple
+    - **stream**: Stream the answer as newline-delimited JSON events instead of a single response
     """
     start_time = time.time()
     
     try:
         loguru.logger.info(f"Processing search query: {request.query}")
         
-        # Get the index
-        index = get_index()
+        # Only decompose queries that are likely to have several parts
+        use_sub_questions = request.use_sub_questions and (
+            request.force_sub_questions or _is_complex_query(request.query)
+        )
+        if request.use_sub_questions and not use_sub_questions:
+            loguru.logger.info("Query looks simple, skipping sub-question decomposition")
         
-        if request.use_sub_questions:
-            # Use SubQuestionQueryEngine for complex queries
-            loguru.logger.info("Using SubQuestionQueryEngine for query decomposition")
-            
-            question_gen = LLMQuestionGenerator.from_defaults(
-                prompt_template_str="""
-                    Follow the example, but instead of giving a question, always prefix the question
-                    with: 'Answer in markdown. By first identifying and quoting the most relevant sources, '.
-                    """
-                + DEFAULT_SUB_QUESTION_PROMPT_TMPL,
+        # Serve repeated queries from the answer cache
+        answer_key = _answer_key(request, use_sub_questions)
+        cached = _get_cached_answer(answer_key, index)
+        if cached is not None:
+            loguru.logger.info("Serving search from answer cache")
+            if request.stream:
+                return StreamingResponse(
+                    _stream_cached(cached),
+                    media_type="application/x-ndjson",
+                )
+            return cached.model_copy(
+                update={"query": request.query, "processing_time_seconds": 0.0},
             )
-            
-            engine = index.as_query_engine(similarity_top_k=request.similarity_top_k)
-            
-            query_engine = SubQuestionQueryEngine.from_defaults(
-                query_engine_tools=[
-                    QueryEngineTool(
-                        query_engine=engine,
-                        metadata=ToolMetadata(
-                            name="airline_policy_documents",
-                            description="Airline policy documents for answering questions about airline policies and related topics.",
-                        ),
-                    )
-                ],
-                question_gen=question_gen,
-                use_async=False,
-            )
-        else:
-            # Use simple query engine
-            loguru.logger.info("Using standard query engine")
-            query_engine = index.as_query_engine(similarity_top_k=request.similarity_top_k)
+        
+        query_engine = _get_engine(
+            index,
+            request.similarity_top_k,
+            use_sub_questions,
+            request.stream,
+        )
         
         # Execute query
-        response = query_engine.query(request.query)
+        response = await query_engine.aquery(request.query)
+        
+        if request.stream:
+            return StreamingResponse(
+                _stream_search(request, response, index, answer_key, start_time),
+                media_type="application/x-ndjson",
+            )
         
         # Extract answer
         answer = str(response)
         
         # Check if response is empty or contains the "Empty Response" placeholder
         # Small guardrails
-        if not answer or answer.strip() == "" or answer.strip().lower() == "empty response":
+        if _is_empty_answer(answer):
             loguru.logger.warning(f"Empty response for query: {request.query}")
-            answer = "I couldn't find relevant information to answer your question. Please contact customer support for further assistance."
+            answer = EMPTY_ANSWER_MESSAGE
         
         # Extract source nodes if available
-        results = []
-        if hasattr(response, "source_nodes"):
-            for node in response.source_nodes:
-                if not node.text.lower().strip().startswith("sub question:"):
-                    # Extract metadata from node metadata if available
-                    if hasattr(node, "metadata"):
-                        file_name = node.metadata.get("file_name")
-                        summary = node.metadata.get("document_title")
-                    
-                    result = SearchResult(
-                        file_name=file_name if file_name else "Unknown",
-                        summary=summary if summary else "No summary available",
-                        score=node.score if hasattr(node, "score") else None,
-                    )
-                    results.append(result)
+        results = _extract_results(response)
         
         processing_time = time.time() - start_time
         
         loguru.logger.info(f"Search completed in {processing_time:.2f}s")
         
-        return SearchResponse(
+        search_response = SearchResponse(
             query=request.query,
             answer=answer,
             results=results,
             processing_time_seconds=processing_time,
         )
+        _cache_answer(answer_key, index, search_response)
+        return search_response
     
     except Exception as e:
         processing_time = time.time() - start_time
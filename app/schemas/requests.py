@@ -56,3 +56,11 @@ class SearchRequest(BaseModel):
         default=False,
         description="Use SubQuestionQueryEngine for complex queries"
     )
+    force_sub_questions: bool = Field(
+        default=False,
+        description="Use SubQuestionQueryEngine even for queries that look simple"
+    )
+    stream: bool = Field(
+        default=False,
+        description="Stream the answer as newline-delimited JSON events"
+    )
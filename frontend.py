@@ -10,7 +10,7 @@ The Gradio app will be available at http://localhost:7860
 Make sure the FastAPI backend is running at http://localhost:8000
 """
 import sys
-from app.frontend.gradio_app import create_gradio_app
+from app.frontend.gradio_app import create_gradio_app, client_lifespan
 
 
 def main():
@@ -32,6 +32,7 @@ def main():
             server_port=7860,
             share=False,
             show_error=True,
+            app_kwargs={"lifespan": client_lifespan},
         )
     except KeyboardInterrupt:
         print("\n\n👋 Shutting down Gradio frontend...")
@@ -4,8 +4,9 @@ Main FastAPI application for GenAI RAG Chatbot.
 from datetime import datetime
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
-from app.core import initialize_settings
+from app.core import initialize_settings, lifespan
 from app.schemas import HealthResponse
 from app.routers import ingestion_router, search_router
 
@@ -21,6 +22,8 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware (allow all origins for development)